@@ -1,11 +1,19 @@
 import sys
-import re
+from functools import lru_cache
 from io import StringIO
 
 # --- Helper to identify variables ---
 def is_variable(token):
-    """Checks if a token is a valid variable name."""
-    return token == '밥' or re.fullmatch(r'바아*압', token)
+    """Checks if a token is a valid variable name ('밥' or 바아*압)."""
+    if token == '밥':
+        return True
+    n = len(token)
+    if n < 2 or token[0] != '바' or token[-1] != '압':
+        return False
+    for i in range(1, n - 1):
+        if token[i] != '아':
+            return False
+    return True
 
 # --- Pre-defined Strings ---
 PREDEFINED_STRINGS = {
@@ -17,137 +25,235 @@ PREDEFINED_STRINGS = {
     "그록": "그록 누가씀?",
 }
 
-# --- Custom Exception for Return ---
-class ReturnValue(Exception):
-    def __init__(self, value):
-        self.value = value
+# --- Bytecode Opcodes ---
+# Instructions are laid out flat in a single list: each opcode is followed
+# inline by its operand (if any).
+OP_CONST = 0    # operand: value
+OP_VAR = 1      # operand: variable slot
+OP_STORE = 2    # operand: variable slot
+OP_ADD = 3
+OP_MUL = 4
+OP_EQ = 5
+OP_LT = 6
+OP_LE = 7
+OP_JZ = 8       # operand: jump target
+OP_JMP = 9      # operand: jump target
+OP_PRINT = 10
+OP_CALL = 11    # operand: function slot
+OP_RET = 12
+OP_INPUT = 13
+OP_DEF = 14     # operands: function slot, offset just past the function body
+
+# Each binary operator has its own AST node type: (type, left, right)
+BINARY_OPCODES = {'add': OP_ADD, 'mul': OP_MUL, 'eq': OP_EQ, 'lt': OP_LT, 'le': OP_LE}
+
+# Printed text of small integers (e.g. loop counters), so printing them
+# does not build a new string each time
+SMALL_INT_MIN = -128
+SMALL_INT_MAX = 1024
+SMALL_INT_STRINGS = tuple(str(i) for i in range(SMALL_INT_MIN, SMALL_INT_MAX))
+
+# --- Keywords and Operators ---
+STATEMENT_STARTERS = frozenset(('입', '몰', '스크럼', '캠프', '퇴근'))
+
+OPERATORS = {
+    '덧셈': 'add', '합': 'add', '더하기': 'add',
+    '곱셈': 'mul', '곱': 'mul',
+    '같': 'eq',
+    '작': 'lt',
+    '같작': 'le', '작같': 'le',
+}
+
+# The tokenizer hands out these interned instances for keywords, so the
+# parser can compare them by identity.
+KEYWORDS = {word: sys.intern(word) for word in ('밥', '은', '입', '몰', '스크럼', '퇴근', '뭐먹', '[', ']', *OPERATORS)}
+KW_ASSIGN = KEYWORDS['은']
+KW_IF = KEYWORDS['입']
+KW_WHILE = KEYWORDS['몰']
+KW_PRINT = KEYWORDS['스크럼']
+KW_RETURN = KEYWORDS['퇴근']
+KW_INPUT = KEYWORDS['뭐먹']
+KW_BLOCK_START = KEYWORDS['[']
+KW_BLOCK_END = KEYWORDS[']']
 
 # --- Manual Tokenizer V2 ---
+# Tokens are (kind, value) pairs. Numbers are converted to int and string
+# literals have their quotes stripped; everything else (keywords, variables,
+# operators, block markers) is an identifier.
+TOKEN_NUMBER = 0
+TOKEN_STRING = 1
+TOKEN_IDENT = 2
+
+QUOTE_CHARS = frozenset('"\'`')
+BRACKET_CHARS = frozenset('[]')
+TOKEN_DELIMITERS = QUOTE_CHARS | BRACKET_CHARS
+SIGN_CHARS = frozenset('+-')
+
 def tokenize(code):
-    code = code.replace('[', ' [ ').replace(']', ' ] ')
-    tokens = []
+    """Yields tokens one at a time; the parser only ever looks one token ahead."""
+    n = len(code)
     i = 0
-    while i < len(code):
+    while i < n:
         char = code[i]
         if char.isspace():
             i += 1
             continue
-        
-        if char in ['"', "'", '`']:
-            quote_char = char
-            string_token = char
+
+        # Block markers are always tokens of their own
+        if char in BRACKET_CHARS:
+            yield (TOKEN_IDENT, KEYWORDS[char])
             i += 1
-            while i < len(code) and code[i] != quote_char:
-                string_token += code[i]
-                i += 1
-            if i < len(code): # Add the closing quote
-                string_token += code[i]
-                i += 1
-            tokens.append(string_token)
+            continue
+
+        if char in QUOTE_CHARS:
+            start = i + 1
+            i = code.find(char, start)
+            if i == -1:
+                raise SyntaxError(f"Unterminated string literal: {code[start - 1:]}")
+            yield (TOKEN_STRING, code[start:i])
+            i += 1 # Skip the closing quote
             continue
 
         # For other tokens
-        other_token = char
+        start = i
         i += 1
-        while i < len(code) and not code[i].isspace() and code[i] not in ['"', "'", '`', '[', ']']:
-            other_token += code[i]
+        while i < n and not code[i].isspace() and code[i] not in TOKEN_DELIMITERS:
             i += 1
-        tokens.append(other_token)
-
-    return tokens
-
-# --- Parser (creates AST) ---
+        text = code[start:i]
+        if text.isdecimal() or (text[0] in SIGN_CHARS and text[1:].isdecimal()):
+            yield (TOKEN_NUMBER, int(text))
+        else:
+            yield (TOKEN_IDENT, KEYWORDS.get(text, text))
+
+# --- Constant Evaluation ---
+def evaluate_bin_op(op, left, right):
+    """Applies a binary operator exactly as the bytecode VM does."""
+    if op == 'add':
+        if isinstance(left, str) or isinstance(right, str):
+            return str(left) + str(right)
+        return left + right
+    if op == 'mul': return left * right
+    if op == 'eq': return left == right
+    if op == 'lt': return left < right
+    if op == 'le': return left <= right
+    raise ValueError(f"Unsupported operator: {op}")
+
+# --- Parser (creates AST and compiles it to bytecode) ---
 class Parser:
     def __init__(self, tokens):
-        self.tokens = tokens
-        self.pos = 0
+        self.tokens = iter(tokens)
+        self.current = next(self.tokens, None)
+        # Node type -> bound compile method, built once instead of a
+        # getattr(f'compile_{type}') per node
+        self.compilers = {
+            'lit': self.compile_lit, 'variable': self.compile_variable,
+            'input': self.compile_input, 'assign': self.compile_assign,
+            'print': self.compile_print,
+            'if': self.compile_if, 'while': self.compile_while,
+            'func_def': self.compile_func_def, 'func_call': self.compile_func_call,
+            'return': self.compile_return,
+            **{op: self.compile_bin_op for op in BINARY_OPCODES},
+        }
 
     def peek(self):
-        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+        return self.current
+
+    def peek_word(self):
+        """Returns the next token's text if it is an identifier, else None."""
+        token = self.peek()
+        return token[1] if token and token[0] == TOKEN_IDENT else None
 
     def consume(self, expected_token=None):
         token = self.peek()
-        if expected_token and token != expected_token:
-            raise SyntaxError(f"Expected '{expected_token}' but found '{token}'")
-        self.pos += 1
+        if token is None:
+            raise SyntaxError("Unexpected end of input")
+        if expected_token and (token[0] != TOKEN_IDENT or token[1] is not expected_token):
+            raise SyntaxError(f"Expected '{expected_token}' but found '{token[1]}'")
+        self.current = next(self.tokens, None)
         return token
 
+    def ends_expression(self, token):
+        # An expression ends if we see a keyword that starts a new statement, or a block marker
+        if token[0] != TOKEN_IDENT:
+            return False
+        word = token[1]
+        return word in BRACKET_CHARS or word in STATEMENT_STARTERS or is_variable(word)
+
     def parse_expression(self):
+        # This is a simple precedence-free, left-to-right parser
         left_node = self.parse_simple_expr()
-        statement_starters = ['입', '몰', '스크럼', '캠프', '퇴근']
-        
-        while self.peek() and self.peek() not in ['[', ']'] and not is_variable(self.peek()) and self.peek() not in statement_starters:
+
+        while (token := self.peek()) and not self.ends_expression(token):
             op_token = self.consume()
             op = self.get_operator(op_token)
             right_node = self.parse_simple_expr()
-            left_node = ('bin_op', op, left_node, right_node)
-            
+            left_node = (op, left_node, right_node)
+
         return left_node
 
     def parse_simple_expr(self):
-        token = self.consume()
-        if (token.startswith('"') and token.endswith('"')) or \
-           (token.startswith("'") and token.endswith("'")) or \
-           (token.startswith('`') and token.endswith('`')):
-            return ('string', token[1:-1])
-        
-        if token == '뭐먹':
+        kind, value = self.consume()
+        if kind == TOKEN_NUMBER:
+            return ('number', value)
+        if kind == TOKEN_STRING:
+            return ('string', value)
+
+        if value is KW_INPUT:
             return ('input',)
-        if token in PREDEFINED_STRINGS:
-            return ('string', PREDEFINED_STRINGS[token])
-        if is_variable(token):
-            return ('variable', token)
-        try:
-            return ('number', int(token))
-        except ValueError:
-            raise SyntaxError(f"Unknown value or variable: {token}")
+        if value in PREDEFINED_STRINGS:
+            return ('string', PREDEFINED_STRINGS[value])
+        if is_variable(value):
+            return ('variable', value)
+        raise SyntaxError(f"Unknown value or variable: {value}")
 
     def get_operator(self, token):
-        if token in ['덧셈', '합', '더하기']: return '+'
-        if token in ['곱셈', '곱']: return '*'
-        if token == '같': return '=='
-        if token == '작': return '<'
-        if token in ['같작', '작같']: return '<='
-        raise SyntaxError(f"Unknown operator: {token}")
+        kind, value = token
+        if kind == TOKEN_IDENT and value in OPERATORS:
+            return OPERATORS[value]
+        raise SyntaxError(f"Unknown operator: {value}")
 
     def parse_block(self):
-        self.consume('[')
+        self.consume(KW_BLOCK_START)
         statements = []
-        while self.peek() != ']':
+        while self.peek_word() is not KW_BLOCK_END:
             statements.append(self.parse_statement())
-        self.consume(']')
+        self.consume(KW_BLOCK_END)
         return statements
 
     def parse_statement(self):
-        token = self.peek()
+        if self.peek() is None:
+            raise SyntaxError("Unexpected end of input")
+        token = self.peek_word()
+        if token is None:
+            raise SyntaxError(f"Unexpected statement start: {self.peek()[1]}")
         if is_variable(token):
-            var_name = self.consume()
-            self.consume('은')
+            var_name = self.consume()[1]
+            self.consume(KW_ASSIGN)
             expr = self.parse_expression()
             return ('assign', var_name, expr)
-        if token == '스크럼':
-            self.consume('스크럼')
+        if token is KW_PRINT:
+            self.consume(KW_PRINT)
             expr = self.parse_expression()
             return ('print', expr)
-        if token == '입':
-            self.consume('입')
+        if token is KW_IF:
+            self.consume(KW_IF)
             condition = self.parse_expression()
             body = self.parse_block()
             return ('if', condition, body)
-        if token == '몰':
-            self.consume('몰')
+        if token is KW_WHILE:
+            self.consume(KW_WHILE)
             condition = self.parse_expression()
             body = self.parse_block()
             return ('while', condition, body)
         if token.startswith('캠프'):
-            func_name = self.consume()
-            if self.peek() == '[':
+            func_name = self.consume()[1]
+            if self.peek_word() is KW_BLOCK_START:
                 body = self.parse_block()
                 return ('func_def', func_name, [], body)
             else:
                 return ('func_call', func_name, [])
-        if token == '퇴근':
-            self.consume('퇴근')
+        if token is KW_RETURN:
+            self.consume(KW_RETURN)
             expr = self.parse_expression()
             return ('return', expr)
         raise SyntaxError(f"Unexpected statement start: {token}")
@@ -156,36 +262,182 @@ class Parser:
         statements = []
         while self.peek():
             statements.append(self.parse_statement())
-        return statements
-
-# --- Interpreter (executes AST) ---
+        statements = self._optimize_block(statements)
+        return self.compile(statements)
+
+    # --- AST Optimizer ---
+    def _optimize_block(self, statements):
+        """Optimizes a list of statements, resolving blocks with constant conditions.
+
+        An if with a constant condition is replaced by its body or dropped, and
+        a while whose condition is constantly false is dropped.
+        """
+        optimized = []
+        for stmt in statements:
+            stmt = self._optimize(stmt)
+            if stmt[0] == 'if' and stmt[1][0] == 'lit':
+                if stmt[1][1]:
+                    optimized.extend(stmt[2])
+                continue
+            if stmt[0] == 'while' and stmt[1][0] == 'lit' and not stmt[1][1]:
+                continue
+            optimized.append(stmt)
+        return optimized
+
+    def _optimize(self, node):
+        """Turns literals into ('lit', value) nodes and folds constant binary ops."""
+        node_type = node[0]
+        if node_type == 'number' or node_type == 'string':
+            return ('lit', node[1])
+        if node_type in BINARY_OPCODES:
+            left_node = self._optimize(node[1])
+            right_node = self._optimize(node[2])
+            if left_node[0] == 'lit' and right_node[0] == 'lit':
+                left, right = left_node[1], right_node[1]
+                # Folding also covers code that may never run, so don't build
+                # repeated strings, which can be arbitrarily large
+                if not (node_type == 'mul' and (type(left) is str or type(right) is str)):
+                    try:
+                        return ('lit', evaluate_bin_op(node_type, left, right))
+                    except (TypeError, MemoryError, OverflowError):
+                        pass # Leave the error to be raised at runtime
+            return (node_type, left_node, right_node)
+        if node_type == 'assign':
+            return ('assign', node[1], self._optimize(node[2]))
+        if node_type == 'print' or node_type == 'return':
+            return (node_type, self._optimize(node[1]))
+        if node_type == 'if' or node_type == 'while':
+            return (node_type, self._optimize(node[1]), self._optimize_block(node[2]))
+        if node_type == 'func_def':
+            return ('func_def', node[1], node[2], self._optimize_block(node[3]))
+        return node
+
+    # --- Bytecode Compiler ---
+    def compile(self, ast):
+        """Compiles the AST into a flat bytecode list.
+
+        Returns a (code, functions, variables) tuple, where functions and
+        variables list the function and variable names by slot index.
+        """
+        self.code = []
+        self.function_slots = {}
+        self.variable_slots = {}
+        self.assigned = set()
+        self.in_function = False
+        for stmt in ast:
+            self.compile_node(stmt)
+        for var_name in self.variable_slots:
+            if var_name not in self.assigned:
+                raise SyntaxError(f"Variable '{var_name}' is never assigned.")
+        return self.code, list(self.function_slots), list(self.variable_slots)
+
+    def compile_node(self, node):
+        self.compilers[node[0]](node)
+
+    def slot(self, var_name):
+        """Returns the slot index of a variable, allocating one on first use."""
+        if var_name not in self.variable_slots:
+            self.variable_slots[var_name] = len(self.variable_slots)
+        return self.variable_slots[var_name]
+
+    def function_slot(self, func_name):
+        """Returns the slot index of a function, allocating one on first use."""
+        if func_name not in self.function_slots:
+            self.function_slots[func_name] = len(self.function_slots)
+        return self.function_slots[func_name]
+
+    def emit(self, *items):
+        self.code.extend(items)
+
+    def emit_jump(self, op):
+        """Emits a jump with a placeholder target and returns the slot to patch."""
+        self.emit(op, None)
+        return len(self.code) - 1
+
+    def patch_jump(self, slot):
+        self.code[slot] = len(self.code)
+
+    def compile_lit(self, node): self.emit(OP_CONST, node[1])
+    def compile_variable(self, node): self.emit(OP_VAR, self.slot(node[1]))
+    def compile_input(self, node): self.emit(OP_INPUT)
+
+    def compile_assign(self, node):
+        self.compile_node(node[2])
+        self.assigned.add(node[1])
+        self.emit(OP_STORE, self.slot(node[1]))
+
+    def compile_print(self, node):
+        self.compile_node(node[1])
+        self.emit(OP_PRINT)
+
+    def compile_bin_op(self, node):
+        self.compile_node(node[1])
+        self.compile_node(node[2])
+        self.emit(BINARY_OPCODES[node[0]])
+
+    def compile_if(self, node):
+        self.compile_node(node[1])
+        exit_slot = self.emit_jump(OP_JZ)
+        for stmt in node[2]:
+            self.compile_node(stmt)
+        self.patch_jump(exit_slot)
+
+    def compile_while(self, node):
+        loop_start = len(self.code)
+        # A constant condition is always true here (false ones were optimized
+        # away), so it needs no test at all
+        exit_slot = None
+        if node[1][0] != 'lit':
+            self.compile_node(node[1])
+            exit_slot = self.emit_jump(OP_JZ)
+        for stmt in node[2]:
+            self.compile_node(stmt)
+        self.emit(OP_JMP, loop_start)
+        if exit_slot is not None:
+            self.patch_jump(exit_slot)
+
+    def compile_func_def(self, node):
+        func_name, body = node[1], node[3]
+        # Function bodies live inline in the same code list. Reaching the
+        # definition at runtime binds the name to the body and jumps over it,
+        # so a redefinition only affects the calls made after it.
+        self.emit(OP_DEF, self.function_slot(func_name), None)
+        skip_slot = len(self.code) - 1
+        outer, self.in_function = self.in_function, True
+        for stmt in body:
+            self.compile_node(stmt)
+        self.in_function = outer
+        self.emit(OP_CONST, None, OP_RET)
+        self.patch_jump(skip_slot)
+
+    def compile_func_call(self, node):
+        self.emit(OP_CALL, self.function_slot(node[1]))
+
+    def compile_return(self, node):
+        if not self.in_function:
+            raise SyntaxError("'퇴근' used outside of a function")
+        self.compile_node(node[1])
+        self.emit(OP_RET)
+
+# --- Compilation Cache ---
+@lru_cache(maxsize=128)
+def _compile(code):
+    """Tokenizes, parses and compiles source code into (bytecode, functions, variables).
+
+    Results are shared between runs of the same source, so neither must be
+    mutated while executing.
+    """
+    return Parser(tokenize(code)).parse()
+
+# --- Interpreter (executes bytecode) ---
 class Interpreter:
     def __init__(self, input_data=""):
-        self.variables = {}
-        self.functions = {}
-        self.output_buffer = []
+        self.variables = []
+        self.output = StringIO()
         self.input_lines = input_data.splitlines()
         self.input_idx = 0
 
-    def visit(self, node):
-        node_type = node[0]
-        method_name = f'visit_{node_type}'
-        method = getattr(self, method_name, self.generic_visit)
-        return method(node)
-
-    def generic_visit(self, node):
-        raise NotImplementedError(f"No visit_{node[0]} method")
-
-    def visit_number(self, node): return node[1]
-    def visit_string(self, node): return node[1]
-    
-    def visit_variable(self, node):
-        var_name = node[1]
-        if var_name not in self.variables:
-            raise NameError(f"Variable '{var_name}' is not defined.")
-        return self.variables[var_name]
-
-    def visit_input(self, node):
+    def read_input(self):
         if self.input_idx < len(self.input_lines):
             value_str = self.input_lines[self.input_idx]
             self.input_idx += 1
@@ -201,86 +453,104 @@ class Interpreter:
                     return value_str
         return "" # Return empty string if no more input
 
-    def visit_assign(self, node):
-        var_name = node[1]
-        value = self.visit(node[2])
-        self.variables[var_name] = value
-        return value
-
-    def visit_print(self, node):
-        value = self.visit(node[1])
-        self.output_buffer.append(str(value))
-
-    def visit_bin_op(self, node):
-        op, left_node, right_node = node[1], node[2], node[3]
-        left = self.visit(left_node)
-        right = self.visit(right_node)
-        
-        if op == '+':
-            if isinstance(left, str) or isinstance(right, str):
-                return str(left) + str(right)
-            return left + right
-        
-        if op == '*':
-            if (isinstance(left, str) and isinstance(right, int)):
-                return left * right
-            if (isinstance(left, int) and isinstance(right, str)):
-                return right * left
-            return left * right
-
-        # For comparison operators, we can try to be flexible
-        # but for now, we'll rely on Python's default behavior which might raise errors
-        # if types are incompatible (e.g., comparing string and int with '<').
-        if op == '==': return left == right
-        if op == '<': return left < right
-        if op == '<=': return left <= right
-        
-        raise ValueError(f"Unsupported operator: {op}")
-
-    def visit_if(self, node):
-        condition = self.visit(node[1])
-        if condition:
-            for stmt in node[2]:
-                self.visit(stmt)
-
-    def visit_while(self, node):
-        while self.visit(node[1]):
-            for stmt in node[2]:
-                self.visit(stmt)
-
-    def visit_func_def(self, node):
-        func_name, params, body = node[1], node[2], node[3]
-        self.functions[func_name] = {'params': params, 'body': body}
-
-    def visit_func_call(self, node):
-        func_name = node[1]
-        if func_name not in self.functions:
-            raise NameError(f"Function '{func_name}' is not defined.")
-        
-        func = self.functions[func_name]
-        return_value = None
-        try:
-            for stmt in func['body']:
-                self.visit(stmt)
-        except ReturnValue as rv:
-            return_value = rv.value
-        return return_value
-
-    def visit_return(self, node):
-        value = self.visit(node[1])
-        raise ReturnValue(value)
+    def execute(self, code, func_names, var_names):
+        variables = self.variables
+        # Entry offset of each function once its definition has run
+        functions = [None] * len(func_names)
+        write = self.output.write
+        stack = []
+        push = stack.append
+        pop = stack.pop
+        frames = []
+        # Calls no longer use Python frames, so bound the depth the same way
+        max_depth = sys.getrecursionlimit()
+        pc = 0
+        end = len(code)
+        while pc < end:
+            op = code[pc]
+            pc += 1
+            if op == OP_VAR:
+                value = variables[code[pc]]
+                # Slots start out as None, which is never a Mollang value
+                if value is None:
+                    raise NameError(f"Variable '{var_names[code[pc]]}' is not defined.")
+                push(value)
+                pc += 1
+            elif op == OP_CONST:
+                push(code[pc])
+                pc += 1
+            elif op == OP_STORE:
+                variables[code[pc]] = pop()
+                pc += 1
+            elif op == OP_JZ:
+                if pop():
+                    pc += 1
+                else:
+                    pc = code[pc]
+            elif op == OP_JMP:
+                pc = code[pc]
+            elif op == OP_ADD:
+                right = pop()
+                left = stack[-1]
+                if isinstance(left, str) or isinstance(right, str):
+                    stack[-1] = str(left) + str(right)
+                else:
+                    stack[-1] = left + right
+            elif op == OP_MUL:
+                # str * int repeats the string whichever side it is on
+                right = pop()
+                stack[-1] = stack[-1] * right
+            # For comparison operators, we rely on Python's default behavior which
+            # might raise errors if types are incompatible (e.g., str '<' int).
+            elif op == OP_LT:
+                right = pop()
+                stack[-1] = stack[-1] < right
+            elif op == OP_LE:
+                right = pop()
+                stack[-1] = stack[-1] <= right
+            elif op == OP_EQ:
+                right = pop()
+                stack[-1] = stack[-1] == right
+            elif op == OP_PRINT:
+                value = pop()
+                if type(value) is int and SMALL_INT_MIN <= value < SMALL_INT_MAX:
+                    write(SMALL_INT_STRINGS[value - SMALL_INT_MIN])
+                elif type(value) is str:
+                    write(value)
+                else:
+                    write(str(value))
+                write('\n')
+            elif op == OP_INPUT:
+                push(self.read_input())
+            elif op == OP_CALL:
+                entry = functions[code[pc]]
+                if entry is None:
+                    raise NameError(f"Function '{func_names[code[pc]]}' is not defined.")
+                if len(frames) >= max_depth:
+                    raise RecursionError("maximum recursion depth exceeded")
+                frames.append(pc + 1)
+                pc = entry
+            elif op == OP_DEF:
+                functions[code[pc]] = pc + 2
+                pc = code[pc + 1]
+            elif op == OP_RET:
+                # Calls are statements, so the return value is discarded.
+                pop()
+                pc = frames.pop()
+            else:
+                raise ValueError(f"Unknown opcode: {op}")
 
     def run(self, code):
-        self.output_buffer = [] # Reset buffer for each run
+        self.output = StringIO() # Reset output for each run
         try:
-            tokens = tokenize(code)
-            ast = Parser(tokens).parse()
-            for stmt in ast:
-                self.visit(stmt)
+            bytecode, func_names, var_names = _compile(code)
+            self.variables = [None] * len(var_names)
+            self.execute(bytecode, func_names, var_names)
         except Exception as e:
-            self.output_buffer.append(f"Error: {type(e).__name__}: {e}")
-        
-        return "\n".join(self.output_buffer)
+            self.output.write(f"Error: {type(e).__name__}: {e}\n")
+
+        # Every line ends with a newline; drop the one after the last line
+        return self.output.getvalue()[:-1]
 
 # --- Global Interpreter Instance ---
 interpreter = Interpreter()